@@ -3,8 +3,11 @@ from sys import argv
 
 from aiohttp import ClientSession
 from aiofiles import open
-from asyncio import run, create_task, gather, Semaphore
-from os import walk, path
+from asyncio import run, gather, Semaphore
+from os import scandir
+from media_files import VIDEO_EXTENSIONS
+
+synced_urls = {}
 
 
 async def get_ids_of_shows(session: ClientSession, base_url: str, headers: dict) -> list:
@@ -31,6 +34,42 @@ async def get_ids_of_movies(session: ClientSession, base_url: str, headers: dict
         return await response.json()
 
 
+def index_by_path(media: dict) -> dict:
+    return {item["path"]: item for item in media["data"]}
+
+
+def scan_tree(root: str):
+    try:
+        with scandir(root) as entries:
+            entries = list(entries)
+    except OSError:
+        return
+    yield root, [entry for entry in entries if not entry.is_dir()]
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from scan_tree(entry.path)
+
+
+async def patch_subtitle(
+        session: ClientSession,
+        final_path: str,
+        headers: dict,
+        action: str,
+        language: str,
+        language_not_found: bool,
+        name: str
+):
+    if action == "translate" and language_not_found:
+        print(f"{language} for {name} NOT found")
+        print(final_path)
+        await send_patch(session, final_path, headers, action)
+    elif action == "sync":
+        print(f"{action} for movie: {name}")
+        print(final_path)
+        await send_patch(session, final_path, headers, action)
+        print(f"Finished {action} for movie: {name}")
+
+
 async def subtitle_action(
         session: ClientSession,
         movie: list,
@@ -38,115 +77,106 @@ async def subtitle_action(
         base_url: str,
         headers: dict,
         semaphore: Semaphore,
-        ids_of_movies: dict,
+        media_by_path: dict,
         language: str,
         typeof: str
 ):
     # may god have mercy upon this function...
     if typeof == "movie":
         async with semaphore:
-            tasks = []
-            for true_path, _, file in walk(movie["path"]):
-                subtitle_path = None
-                media_id = None
-                final_path = None
-                language_not_found = True
-                for filename in file:
-                    if "sample" not in filename and filename.endswith(".mkv") or filename.endswith(
-                            ".mp4") or filename.endswith(".avi"):
-                        movie_path = path.join(movie["path"], filename)
-                        for test in ids_of_movies["data"]:
-                            if movie_path == test["path"]:
-                                media_id = test["radarrId"]
-                                if action == "translate":
-                                    for subtitle in test["subtitles"]:
-                                        if language in subtitle["code2"]:
-                                            language_not_found = False
-                                            break
-
-                    if filename.endswith("en.srt"):
-                        subtitle_path = path.join(movie["path"], filename)
-
-                    if subtitle_path is None or media_id is None:
-                        continue
-                    final_path = f"{base_url}/api/subtitles?action={action}&language={language}&path={subtitle_path}&type={typeof}&id={media_id}"
+            subtitle_path = None
+            media_id = None
+            final_path = None
+            language_not_found = True
+            # files are matched relative to movie["path"], so only its top level counts
+            try:
+                with scandir(movie["path"]) as entries:
+                    files = [entry for entry in entries if not entry.is_dir()]
+            except OSError:
+                files = []
+            for file in files:
+                filename = file.name
+                if "sample" not in filename and filename.endswith(VIDEO_EXTENSIONS):
+                    test = media_by_path.get(file.path)
+                    if test is not None:
+                        media_id = test["radarrId"]
+                        if action == "translate":
+                            for subtitle in test["subtitles"]:
+                                if language in subtitle["code2"]:
+                                    language_not_found = False
+                                    break
+
+                if filename.endswith("en.srt"):
+                    subtitle_path = file.path
+
+            if subtitle_path is not None and media_id is not None:
+                final_path = f"{base_url}/api/subtitles?action={action}&language={language}&path={subtitle_path}&type={typeof}&id={media_id}"
 
             if final_path is not None:
-                if action == "translate" and language_not_found:
-                    print(f"{language} for {movie['name']} NOT found")
-                    print(final_path)
-                    task = create_task(send_patch(session, final_path, headers, action))
-                    tasks.append(task)
-                elif action == "sync":
-                    print(f"{action} for movie: {movie['name']}")
-                    print(final_path)
-                    task = create_task(send_patch(session, final_path, headers, action))
-                    tasks.append(task)
-                    print(f"Finished {action} for movie: {movie['name']}")
-
-            await gather(*tasks)
+                await patch_subtitle(session, final_path, headers, action, language, language_not_found, movie["name"])
 
     elif typeof == "series":
         async with semaphore:
-            tasks = []
-            for true_path, _, file in walk(movie["path"]):
+            righteous_path = movie["path"]
+            test = None
+            if righteous_path.endswith("/"):
+                test = media_by_path.get(righteous_path[:-1])
+            # the episode list only depends on the series, so fetch it once
+            episodes_by_path = None
+            final_path = None
+            language_not_found = True
+            for _, files in scan_tree(movie["path"]):
                 sonarrEpisodeId = None
                 subtitle_path = None
                 final_path = None
                 language_not_found = True
-                for filename in file:
-                    if "sample" not in filename and filename.endswith(".mkv") or filename.endswith(
-                            ".mp4") or filename.endswith(".avi"):
-                        righteous_path = movie["path"]
-                        for test in ids_of_movies["data"]:
-                            if test["path"] + "/" == righteous_path:
+                for file in files:
+                    filename = file.name
+                    if "sample" not in filename and filename.endswith(VIDEO_EXTENSIONS):
+                        if test is not None:
+                            if episodes_by_path is None:
                                 series_id = test["sonarrSeriesId"]
                                 specific_ids = await get_ids_of_specific_show(session, base_url, headers, series_id)
-                                for episode in specific_ids["data"]:
-                                    episode_file_path = path.join(true_path, filename)
-                                    if episode_file_path == episode["path"]:
-                                        sonarrEpisodeId = episode["sonarrEpisodeId"]
-                                        if action == "translate":
-                                            for subtitle in episode["subtitles"]:
-                                                if language in subtitle["code2"]:
-                                                    language_not_found = False
-                                                    break
+                                episodes_by_path = index_by_path(specific_ids)
+                            episode = episodes_by_path.get(file.path)
+                            if episode is not None:
+                                sonarrEpisodeId = episode["sonarrEpisodeId"]
+                                if action == "translate":
+                                    for subtitle in episode["subtitles"]:
+                                        if language in subtitle["code2"]:
+                                            language_not_found = False
+                                            break
                     if filename.endswith("en.srt"):
-                        subtitle_path = path.join(true_path, filename)
+                        subtitle_path = file.path
 
-                    if subtitle_path is None or sonarrEpisodeId is None:
-                        continue
+                if subtitle_path is not None and sonarrEpisodeId is not None:
                     final_path = f"{base_url}/api/subtitles?action={action}&language={language}&path={subtitle_path}&type={typeof}&id={sonarrEpisodeId}"
                     print(final_path)
 
             if final_path is not None:
-                if action == "translate" and language_not_found:
-                    print(f"{language} for {movie['name']} NOT found")
-                    print(final_path)
-                    task = create_task(send_patch(session, final_path, headers, action))
-                    tasks.append(task)
-                elif action == "sync":
-                    print(f"{action} for movie: {movie['name']}")
-                    print(final_path)
-                    task = create_task(send_patch(session, final_path, headers, action))
-                    tasks.append(task)
-                    print(f"Finished {action} for movie: {movie['name']}")
-                else:
-                    print("fucked")
+                await patch_subtitle(session, final_path, headers, action, language, language_not_found, movie["name"])
 
-            await gather(*tasks)
+
+async def load_synced(filename):
+    try:
+        async with open(filename, "r") as sync_file:
+            return {line.rstrip("\n") async for line in sync_file}
+    except FileNotFoundError:
+        return set()
 
 
 async def is_synced(url, filename):
-    async with open(filename, "r") as sync_file:
-        contents = await sync_file.read()
-        lines = contents.split("\n")
-        return url in lines
+    if filename not in synced_urls:
+        # another coroutine may have loaded it while we were reading
+        synced_urls.setdefault(filename, await load_synced(filename))
+    return url in synced_urls[filename]
 
 
 async def append_to_synced_file(url, filename):
     async with open(filename, "a+") as sync_file:
         await sync_file.write(url + "\n")
+    if filename in synced_urls:
+        synced_urls[filename].add(url)
 
 
 async def send_patch(session, url, headers, filename):
@@ -163,8 +193,11 @@ async def main():
         headers = {"X-API-KEY": api_key, "accept": "application/json"}
 
         async with ClientSession() as session:
-            list_of_movies = await get_list_of_movies(session, base_url, dir_path, headers)
-            ids_of_movies = await get_ids_of_movies(session, base_url, headers)
+            list_of_movies, ids_of_movies = await gather(
+                get_list_of_movies(session, base_url, dir_path, headers),
+                get_ids_of_movies(session, base_url, headers)
+            )
+            movies_by_path = index_by_path(ids_of_movies)
             semaphore = Semaphore(1)
             tasks = [subtitle_action(
                 session,
@@ -173,7 +206,7 @@ async def main():
                 base_url,
                 headers,
                 semaphore,
-                ids_of_movies,
+                movies_by_path,
                 "en",
                 "movie"
             ) for movie in list_of_movies]
@@ -12,9 +12,11 @@ async def main():
         headers = {"X-API-KEY": api_key, "accept": "application/json"}
 
         async with ClientSession() as session:
-            list_of_movies = await bazarr_syncer.get_list_of_movies(session, base_url, dir_path, headers)
-            ids_of_movies = await bazarr_syncer.get_ids_of_movies(session, base_url, headers)
-            ids_of_shows = await bazarr_syncer.get_ids_of_shows(session, base_url, headers)
+            list_of_movies, ids_of_shows = await gather(
+                bazarr_syncer.get_list_of_movies(session, base_url, dir_path, headers),
+                bazarr_syncer.get_ids_of_shows(session, base_url, headers)
+            )
+            shows_by_path = bazarr_syncer.index_by_path(ids_of_shows)
             semaphore = Semaphore(3)
             tasks = [bazarr_syncer.subtitle_action(
                 session,
@@ -23,7 +25,7 @@ async def main():
                 base_url,
                 headers,
                 semaphore,
-                ids_of_shows,
+                shows_by_path,
                 "sv",
                 "movie"
             ) for movie in list_of_movies]
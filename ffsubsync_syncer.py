@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 import concurrent.futures
-from os import walk, path
+from os import scandir
 from sys import argv
 from mkv_finder_replacer import get_absolute_path
 from subprocess import run as sub_run
+from media_files import VIDEO_EXTENSIONS
 
 
 def start_subprocess(final_command: str):
@@ -18,14 +19,20 @@ def sync_subtitles(folder, synced_set):
     subtitle_path = None
     movie_path = None
     final_command = None
-    for i, j, files in walk(folder):
-        for filename in files:
-            if "sample" not in filename and (filename.endswith(".mkv") or filename.endswith(".mp4") or filename.endswith(".avi")):
-                movie_path = path.join(folder, filename)
-            if filename.endswith("en.srt"):
-                subtitle_path = path.join(folder, filename)
-            if subtitle_path is not None and movie_path is not None:
-                final_command = f"ffsubsync --overwrite-input \"{movie_path}\" -i \"{subtitle_path}\""
+    try:
+        with scandir(folder) as files:
+            for file in files:
+                if file.is_dir():
+                    continue
+                filename = file.name
+                if "sample" not in filename and filename.endswith(VIDEO_EXTENSIONS):
+                    movie_path = file.path
+                if filename.endswith("en.srt"):
+                    subtitle_path = file.path
+    except OSError:
+        return
+    if subtitle_path is not None and movie_path is not None:
+        final_command = f"ffsubsync --overwrite-input \"{movie_path}\" -i \"{subtitle_path}\""
 
     if final_command is not None:
         if not is_synced(movie_path, synced_set):
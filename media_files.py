@@ -0,0 +1 @@
+VIDEO_EXTENSIONS = (".mkv", ".mp4", ".avi")
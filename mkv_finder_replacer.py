@@ -1,26 +1,39 @@
 #!/usr/bin/env python3
+import concurrent.futures
 import os
 import ffmpeg
 from sys import argv
 
 
 def get_absolute_path(path: str):
-    absolute_path = [os.path.join(path, file) for file in os.listdir(path)]
+    with os.scandir(path) as entries:
+        absolute_path = [entry.path for entry in entries]
     return absolute_path
 
 
+def find_corrupt(folder: str):
+    corrupt = []
+    with os.scandir(folder) as files:
+        for file in files:
+            if file.name.endswith(".mkv") and file.is_file():
+                try:
+                    ffmpeg.probe(file.path)
+                except Exception:
+                    corrupt.append(file.path)
+    return corrupt
+
+
 def main():
     corrupt = []
     movies_path = argv[1]
-    sub_movies_path = get_absolute_path(movies_path)
 
-    for folder in sub_movies_path:
-        for file in get_absolute_path(folder):
-            if file.endswith(".mkv"):
-                try:
-                    ffmpeg.probe(file)
-                except Exception:
-                    corrupt.append(file)
+    with os.scandir(movies_path) as folders:
+        sub_movies_path = [folder.path for folder in folders if folder.is_dir()]
+
+    # ffprobe runs as a subprocess, so threads overlap the probes
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        for folder_corrupt in executor.map(find_corrupt, sub_movies_path):
+            corrupt.extend(folder_corrupt)
 
     with open("corrupt", "w") as fail:
         fail.write(str(corrupt))